@@ -0,0 +1,40 @@
+from dotenv import load_dotenv
+from pathlib import Path
+from typing import List
+import os
+import re
+
+# Settings come from the environment, with logic/.env filling in anything
+# unset. Loaded once here; other modules import the values below.
+LOGIC_DIR = Path(__file__).parent.parent
+load_dotenv(dotenv_path=LOGIC_DIR / ".env")
+
+DATA_DIR = LOGIC_DIR / "data"  # SQLite database
+CACHE_DIR = LOGIC_DIR / "cache"  # scrape results and Gemini answers
+
+
+def _load_api_keys() -> List[str]:
+    """
+    GOOGLE_API_KEY plus any numbered GOOGLE_API_KEY_1..N, each once, in order.
+    Several keys multiply the requests per minute Gemini allows.
+    """
+    numbered = sorted(
+        (name for name in os.environ if re.fullmatch(r"GOOGLE_API_KEY_\d+", name)),
+        key=lambda name: int(name.rpartition("_")[2]),
+    )
+    names = ["GOOGLE_API_KEY", *numbered]
+    keys = (os.getenv(name) for name in names)
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+GOOGLE_API_KEYS = _load_api_keys()
+
+# URLs a batch scrapes at once. Each runs its own Gemini call, so size this
+# to the API tier's rate limit: about 2 on the free tier, 15 on paid.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", 2))
+
+# uvicorn worker processes started by `python main.py`. Keep this at 1: the
+# single SQLite writer, the scraping browser, SCRAPE_CONCURRENCY and the
+# Gemini key cooldowns are all per process, so each extra worker adds its own
+# browser and its own share of Gemini calls on top of the limits above.
+WORKERS = int(os.getenv("WORKERS", 1))
@@ -1,29 +1,152 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from pathlib import Path
+from sqlalchemy.pool import QueuePool
+import os
+import sqlite3
+
+from app.config import DATA_DIR
 
 # Create a 'data' directory in the logic folder for the SQLite database
-db_dir = Path(__file__).parent.parent / "data"
+db_dir = DATA_DIR
 db_dir.mkdir(exist_ok=True)
+db_path = db_dir / "jobtracker.db"
 
 # SQLite database URL
-DATABASE_URL = f"sqlite:///{db_dir / 'jobtracker.db'}"
+DATABASE_URL = f"sqlite:///{db_path}"
+# Same file opened read-only through an SQLite URI. as_uri() percent-encodes
+# the path, so a '#', '?' or '%' in it can't end the filename early.
+READ_DATABASE_URI = f"{db_path.resolve().as_uri()}?mode=ro"
+
+
+def connect_read_only():
+    return sqlite3.connect(READ_DATABASE_URI, uri=True, check_same_thread=False)
+
 
-# Create engine with SQLite-specific settings
-engine = create_engine(
+# Keep a fixed set of long-lived connections so SQLite's page cache stays warm
+# and PRAGMAs are not re-applied per request
+POOL_SIZE = (os.cpu_count() or 1) * 2 + 1
+
+# SQLite allows a single writer per database, so writes go through an engine
+# with exactly one connection; waiting for it serializes writers in the pool
+# instead of on SQLite's file lock. That only holds within one process: with
+# several workers, SQLite's lock serializes the workers' writers. Reads use a
+# separate read-only pool, which WAL lets run alongside the writer.
+write_engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},  # Needed for SQLite with FastAPI
+    poolclass=QueuePool,
+    pool_size=1,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    query_cache_size=1200,
     echo=False  # Set to True for SQL query logging during development
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+read_engine = create_engine(
+    "sqlite://",
+    creator=connect_read_only,
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    query_cache_size=1200,
+    echo=False
+)
+
+# Schema creation and migrations run against the writer
+engine = write_engine
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply SQLite PRAGMAs to every new DBAPI connection.
+    Runs once per physical connection, so pooled connections keep them.
+    """
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers and the writer work concurrently, and with
+    # synchronous=NORMAL a commit no longer waits on an fsync. The mode is
+    # stored in the database file; read-only connections just report it.
+    journal_mode = cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    if journal_mode.lower() != "wal":
+        print(f"Warning: SQLite journal_mode is '{journal_mode}', expected 'wal'")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=134217728")  # 128 MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB (negative = KiB)
+    # Truncate the -wal file back to 64 MB after checkpoints so a burst of
+    # writes doesn't leave it large for the life of the process
+    cursor.execute("PRAGMA journal_size_limit=67108864")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+event.listen(write_engine, "connect", set_sqlite_pragmas)
+event.listen(read_engine, "connect", set_sqlite_pragmas)
+
+
+class DatabaseMetrics:
+    """
+    Counters for connection pool activity, exposed on /healthz/db.
+    """
+
+    # The event listeners below increment these on every checkout
+    __slots__ = ("engine", "connections_opened", "checkouts")
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connections_opened = 0
+        self.checkouts = 0
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connections_opened += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def snapshot(self):
+        pool = self.engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool reports unopened slots as negative overflow
+            "overflow": max(pool.overflow(), 0),
+            "connections_opened": self.connections_opened,
+            "checkouts": self.checkouts,
+        }
+
+
+db_metrics = {
+    "read": DatabaseMetrics(read_engine),
+    "write": DatabaseMetrics(write_engine),
+}
+
+# Objects stay loaded after commit, so rows returned by INSERT ... RETURNING
+# can be serialized without being re-selected
+WriteSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=write_engine
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+# Dependency to get a DB session for GET endpoints
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency to get a DB session for endpoints that write
+def get_write_db():
+    db = WriteSessionLocal()
     try:
         yield db
     finally:
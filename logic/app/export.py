@@ -0,0 +1,35 @@
+from openpyxl import Workbook
+import io
+
+EXCEL_HEADERS = [
+    "ID",
+    "Company",
+    "Position",
+    "Location",
+    "Salary",
+    "Status",
+    "Date Applied",
+    "Deadline",
+    "Job URL",
+    "Latest Note",
+]
+
+
+def build_xlsx(rows):
+    """
+    Build the applications spreadsheet from plain row tuples and return the
+    .xlsx file as bytes. Kept free of database and app imports so it can run
+    in a worker process.
+    """
+    # Write-only workbooks serialize each row as it is appended instead of
+    # keeping a Cell object per value in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Applications")
+    ws.append(EXCEL_HEADERS)
+
+    for row in rows:
+        ws.append(row)
+
+    excel_file = io.BytesIO()
+    wb.save(excel_file)
+    return excel_file.getvalue()
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
-import io
-from openpyxl import Workbook
-
-from app.database import engine, get_db, Base
+from fastapi.responses import ORJSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, func, and_, lambda_stmt
+from sqlalchemy.orm import Session, selectinload
+from pydantic import TypeAdapter
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import multiprocessing
+import hashlib
+
+from app.database import engine, get_read_db, get_write_db, Base, db_metrics
 from app.models import Application, JobDetail, Note, ActivityLog, Deadline
 from app.schemas import (
     ApplicationCreate,
@@ -24,8 +31,17 @@ from app.schemas import (
     DeadlineResponse,
     ScrapeRequest,
     ScrapeResponse,
+    BatchScrapeRequest,
+    BatchScrapeResult,
+    ScrapeImportRequest,
+    APPLICATION_LIST_ADAPTER,
+    NOTE_LIST_ADAPTER,
+    ACTIVITY_LIST_ADAPTER,
+    DEADLINE_LIST_ADAPTER,
 )
+from app.config import WORKERS
 from app.scrape import JobScraper
+from app.export import build_xlsx
 
 # On Windows, the default asyncio event loop policy (ProactorEventLoop) doesn't
 # support subprocesses, which Playwright's async API needs to launch browsers.
@@ -37,10 +53,13 @@ import asyncio
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Application Tracker API", version="2.0.0")
+# orjson serializes datetimes natively and is much faster than the stdlib
+# json encoder used by the default JSONResponse
+app = FastAPI(
+    title="Application Tracker API",
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -51,7 +70,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-scraper = JobScraper()
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """
+    Gzip responses for clients that accept it, except the Excel export:
+    an xlsx file is already a zip archive, so compressing it again only
+    burns CPU.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith("/export"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Bodies under 1 KB gain little from compression
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024)
+
+# Everything below that touches the database, the browser or worker
+# processes happens at startup rather than on import, since each export
+# worker re-imports this module (see export_pool)
+scraper: Optional[JobScraper] = None
+
+
+@app.on_event("startup")
+def create_tables():
+    Base.metadata.create_all(bind=engine)
+
+    # create_all() skips tables that already exist, so also create any indexes
+    # added to the models after the database file was first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+@app.on_event("startup")
+async def start_scraper():
+    global scraper
+    scraper = JobScraper()
+    # Launching the browser up front keeps the first scrape fast. If it fails
+    # (e.g. browsers not installed yet) the API still starts and the scraper
+    # retries on its first request.
+    try:
+        await scraper.start()
+    except Exception as e:
+        print(f"Warning: could not launch the scraping browser: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_scraper():
+    await scraper.close()
 
 # ============== Health Check ==============
 
@@ -65,6 +134,12 @@ def read_root():
     }
 
 
+@app.get("/healthz/db")
+def database_health():
+    """Report connection pool usage"""
+    return {name: metrics.snapshot() for name, metrics in db_metrics.items()}
+
+
 # ============== Scraping Endpoints ==============
 
 
@@ -72,33 +147,283 @@ def read_root():
 async def scrape_job(request: ScrapeRequest):
     """Scrape job details from a URL using GPT-4"""
     try:
-        data = await scraper.scrape_url(request.url)
+        data = await scraper.scrape_url(request.url, request.refresh)
 
         if not data.get("position_title") and not data.get("company_name"):
             raise HTTPException(
                 status_code=400,
-                detail="Could not extract job information from this URL. Please enter details manually.",
+                detail=data.get("scrape_error")
+                or "Could not extract job information from this URL. Please enter details manually.",
             )
 
         return data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/scrape/batch", response_model=List[BatchScrapeResult])
+async def scrape_jobs(request: BatchScrapeRequest):
+    """Scrape several job URLs concurrently, reporting failures per URL"""
+    results = await scraper.scrape_urls(request.urls, request.refresh)
+
+    response = []
+    for url, result in zip(request.urls, results):
+        if isinstance(result, Exception):
+            response.append({"url": url, "error": str(result)})
+        elif not result.get("position_title") and not result.get("company_name"):
+            response.append(
+                {
+                    "url": url,
+                    "error": result.get("scrape_error")
+                    or "Could not extract job information from this URL.",
+                }
+            )
+        else:
+            response.append({"url": url, "data": result})
+    return response
+
+
+async def run_scrape_import(urls: List[str], refresh: bool):
+    results = await scraper.scrape_urls_batch(urls, refresh)
+    failed = [
+        (url, result)
+        for url, result in zip(urls, results)
+        if isinstance(result, Exception)
+    ]
+    print(f"Scrape import finished: {len(urls) - len(failed)} of {len(urls)} URLs scraped")
+    for url, error in failed:
+        print(f"  {url}: {error}")
+
+
+@app.post("/scrape/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_jobs(request: ScrapeImportRequest, background_tasks: BackgroundTasks):
+    """
+    Scrape a large list of job URLs in the background through the Gemini
+    Batch API. Results land in the scrape cache, so /scrape and /scrape/batch
+    return them instantly once the import finishes.
+    """
+    background_tasks.add_task(run_scrape_import, request.urls, request.refresh)
+    return {"queued": len(request.urls)}
+
+
+# ============== Activity Log Helpers ==============
+
+
+def log_activity(
+    db: Session,
+    application_id: int,
+    activity_type: str,
+    description: Optional[str] = None,
+    old_value: Optional[str] = None,
+    new_value: Optional[str] = None,
+):
+    """
+    Append an activity log entry in the caller's transaction. Entries are
+    never read back through the session, so a Core INSERT skips the ORM's
+    identity map and unit of work.
+    """
+    db.execute(
+        insert(ActivityLog).values(
+            application_id=application_id,
+            activity_type=activity_type,
+            description=description,
+            old_value=old_value,
+            new_value=new_value,
+        )
+    )
+
+
+# ============== List Response Helpers ==============
+
+
+def list_response(
+    adapter: TypeAdapter, rows, status_code: int = status.HTTP_200_OK
+) -> Response:
+    """
+    Serialize ORM rows with a schema list adapter straight to JSON bytes.
+    Endpoints using this set response_model=None and document the schema
+    through `responses`, since the adapter already validates the rows.
+    """
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+        media_type="application/json",
+        status_code=status_code,
+    )
+
+
+# ============== Bulk Insert Helpers ==============
+
+# Rows sent per executemany; SQLAlchemy splits each batch further as needed
+# to stay under SQLite's bound parameter limit
+BULK_INSERT_BATCH_SIZE = 1000
+
+
+def bulk_insert(db: Session, model, rows: List[dict], returning: bool = True):
+    """
+    Insert many rows of a model in the caller's transaction, one executemany
+    per batch instead of the unit of work's INSERT per object. Returns the
+    new objects in input order, or an empty list when returning is False.
+    """
+    stmt = insert(model)
+    if returning:
+        stmt = stmt.returning(model, sort_by_parameter_order=True)
+
+    created = []
+    rows = iter(rows)
+    while batch := list(islice(rows, BULK_INSERT_BATCH_SIZE)):
+        if returning:
+            created.extend(db.scalars(stmt, batch).all())
+        else:
+            db.execute(stmt, batch)
+    return created
+
+
+def bulk_create_applications(
+    db: Session, applications: List[ApplicationCreate]
+) -> List[Application]:
+    """Insert applications and their creation activity entries in bulk"""
+    rows = []
+    for application in applications:
+        values = application.model_dump(exclude={"date_applied"})
+        values["status"] = application.status or "Applied"
+        # Leave date_applied out when not given so its default applies
+        if application.date_applied is not None:
+            values["date_applied"] = application.date_applied
+        rows.append(values)
+
+    db_applications = bulk_insert(db, Application, rows)
+    bulk_insert(
+        db,
+        ActivityLog,
+        [
+            {
+                "application_id": db_application.id,
+                "activity_type": "application_created",
+                "description": f"Applied to {db_application.position_title} at {db_application.company_name}",
+                "old_value": None,
+                "new_value": db_application.status,
+            }
+            for db_application in db_applications
+        ],
+        returning=False,
+    )
+    return db_applications
+
+
 # ============== Application Endpoints ==============
 
+# Every relationship ApplicationResponse serializes. selectinload fetches each
+# with one IN query for the whole result instead of one lazy load per row.
+APPLICATION_RESPONSE_LOADERS = (
+    selectinload(Application.notes),
+    selectinload(Application.activities),
+    selectinload(Application.deadlines),
+    selectinload(Application.job_details),
+)
+
 
-@app.get("/applications", response_model=List[ApplicationResponse])
-def get_applications(db: Session = Depends(get_db)):
-    """Get all applications with related data"""
-    applications = db.query(Application).order_by(Application.created_at.desc()).all()
-    return applications
+def find_application(db: Session, application_id: int) -> Optional[Application]:
+    """
+    Look up an application by id. The lambda statement is analyzed once and
+    its compiled SQL cached, so repeat lookups only bind the new id.
+    """
+    return db.scalar(
+        lambda_stmt(lambda: select(Application).where(Application.id == application_id))
+    )
+
+
+def applications_etag(db: Session, status_filter: Optional[str] = None) -> str:
+    """
+    Fingerprint everything GET /applications returns in one aggregate query.
+    Row counts catch deletes, the newest timestamps catch edits and the
+    newest activity id catches every logged change. The status filter is
+    part of the tag, so each filtered list gets its own.
+    """
+    aggregates = [
+        func.count(Application.id),
+        func.max(Application.updated_at),
+        func.count(JobDetail.id),
+        func.max(JobDetail.updated_at),
+        func.count(Note.id),
+        func.max(Note.updated_at),
+        func.count(Deadline.id),
+        func.max(Deadline.updated_at),
+        func.max(ActivityLog.id),
+    ]
+    version = db.execute(
+        select(*(select(aggregate).scalar_subquery() for aggregate in aggregates))
+    ).one()
+    digest = hashlib.blake2b(
+        str((status_filter, *version)).encode(), digest_size=8
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header, which may list several (weak) tags"""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def application_to_dict(application: Application) -> dict:
+    """
+    Build the ApplicationResponse payload for an application from its rows.
+    Datetimes are left as datetime objects for orjson to format natively.
+    """
+    data = application.to_dict()
+    data["notes"] = [note.to_dict() for note in application.notes]
+    data["activities"] = [activity.to_dict() for activity in application.activities]
+    data["deadlines"] = [deadline.to_dict() for deadline in application.deadlines]
+    data["job_details"] = (
+        application.job_details.to_dict() if application.job_details else None
+    )
+    return data
+
+
+# The rows come straight from the database, so the list skips response_model
+# validation and is serialized from to_dict(); `responses` keeps the schema in
+# the API docs
+@app.get(
+    "/applications",
+    response_model=None,
+    responses={200: {"model": List[ApplicationResponse]}},
+)
+def get_applications(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_read_db),
+):
+    """Get all applications with related data, optionally only one status"""
+    # Let polling clients skip the whole load and serialization when nothing
+    # has changed since their last fetch
+    etag = applications_etag(db, status_filter)
+    # no-cache: browsers may store the list but must revalidate it every time
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers
+        )
+
+    stmt = lambda_stmt(
+        lambda: select(Application)
+        .options(*APPLICATION_RESPONSE_LOADERS)
+        .order_by(Application.created_at.desc())
+    )
+    if status_filter is not None:
+        stmt += lambda s: s.where(Application.status == status_filter)
+    applications = db.scalars(stmt).all()
+    return ORJSONResponse(
+        [application_to_dict(application) for application in applications],
+        headers=cache_headers,
+    )
 
 
 @app.get("/applications/{application_id}", response_model=ApplicationResponse)
-def get_application(application_id: int, db: Session = Depends(get_db)):
+def get_application(application_id: int, db: Session = Depends(get_read_db)):
     """Get a single application with all related data"""
-    application = db.query(Application).filter(Application.id == application_id).first()
+    application = find_application(db, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     return application
@@ -109,10 +434,12 @@ def get_application(application_id: int, db: Session = Depends(get_db)):
     response_model=ApplicationResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_application(application: ApplicationCreate, db: Session = Depends(get_db)):
+def create_application(
+    application: ApplicationCreate, db: Session = Depends(get_write_db)
+):
     """Create a new application"""
     # Create the application
-    db_application = Application(
+    values = dict(
         company_name=application.company_name,
         position_title=application.position_title,
         job_url=application.job_url,
@@ -120,68 +447,94 @@ def create_application(application: ApplicationCreate, db: Session = Depends(get
         salary=application.salary,
         status=application.status or "Applied",
         deadline=application.deadline,
-        date_applied=application.date_applied,
     )
-    db.add(db_application)
-    db.commit()
-    db.refresh(db_application)
+    # Leave date_applied out when not given so its default applies
+    if application.date_applied is not None:
+        values["date_applied"] = application.date_applied
+
+    # INSERT ... RETURNING hands back the new row, defaults included,
+    # so no SELECT is needed to load it afterwards
+    db_application = db.scalar(
+        insert(Application).values(**values).returning(Application)
+    )
 
     # Create activity log for application creation
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=db_application.id,
         activity_type="application_created",
         description=f"Applied to {application.position_title} at {application.company_name}",
         new_value=db_application.status,
     )
-    db.add(activity)
     db.commit()
 
     return db_application
 
 
+@app.post(
+    "/applications/batch",
+    response_model=None,
+    responses={201: {"model": List[ApplicationResponse]}},
+    status_code=status.HTTP_201_CREATED,
+)
+def create_applications(
+    applications: List[ApplicationCreate], db: Session = Depends(get_write_db)
+):
+    """Create many applications in one transaction, e.g. for an import"""
+    db_applications = bulk_create_applications(db, applications)
+    db.commit()
+
+    # Load the relationships the response serializes for the whole batch
+    db.scalars(
+        select(Application)
+        .where(Application.id.in_([a.id for a in db_applications]))
+        .options(*APPLICATION_RESPONSE_LOADERS)
+    ).all()
+    return list_response(
+        APPLICATION_LIST_ADAPTER, db_applications, status.HTTP_201_CREATED
+    )
+
+
 @app.put("/applications/{application_id}", response_model=ApplicationResponse)
 def update_application(
-    application_id: int, application: ApplicationUpdate, db: Session = Depends(get_db)
+    application_id: int,
+    application: ApplicationUpdate,
+    db: Session = Depends(get_write_db),
 ):
     """Update an existing application"""
-    db_application = (
-        db.query(Application).filter(Application.id == application_id).first()
-    )
+    db_application = find_application(db, application_id)
     if not db_application:
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Track status change
     old_status = db_application.status
 
-    # Update fields
-    update_data = application.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_application, key, value)
-
-    db.commit()
-    db.refresh(db_application)
+    # Update only the fields the client sent, read straight off the model
+    # rather than through an intermediate model_dump() dict
+    for key in application.model_fields_set:
+        setattr(db_application, key, getattr(application, key))
 
     # Log status change if status was updated
     if application.status and application.status != old_status:
-        activity = ActivityLog(
+        log_activity(
+            db,
             application_id=db_application.id,
             activity_type="status_change",
             description=f"Status changed from {old_status} to {application.status}",
             old_value=old_status,
             new_value=application.status,
         )
-        db.add(activity)
-        db.commit()
+
+    db.commit()
+    db.refresh(db_application)
 
     return db_application
 
 
 @app.delete("/applications/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_application(application_id: int, db: Session = Depends(get_db)):
+def delete_application(application_id: int, db: Session = Depends(get_write_db)):
     """Delete an application (cascades to all related data)"""
-    db_application = (
-        db.query(Application).filter(Application.id == application_id).first()
-    )
+    db_application = find_application(db, application_id)
     if not db_application:
         raise HTTPException(status_code=404, detail="Application not found")
 
@@ -199,50 +552,55 @@ def delete_application(application_id: int, db: Session = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
 )
 def create_job_details(
-    application_id: int, job_detail: JobDetailCreate, db: Session = Depends(get_db)
+    application_id: int,
+    job_detail: JobDetailCreate,
+    db: Session = Depends(get_write_db),
 ):
     """Create job details for an application"""
     # Check if application exists
-    application = db.query(Application).filter(Application.id == application_id).first()
+    application = find_application(db, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Check if job details already exist
-    existing = (
-        db.query(JobDetail).filter(JobDetail.application_id == application_id).first()
+    existing = db.scalar(
+        select(JobDetail).where(JobDetail.application_id == application_id)
     )
     if existing:
         raise HTTPException(
             status_code=400, detail="Job details already exist for this application"
         )
 
-    db_job_detail = JobDetail(
-        application_id=application_id,
-        description=job_detail.description,
-        requirements=job_detail.requirements,
-        clean_text_content=job_detail.clean_text_content,
-        ai_thoughts=job_detail.ai_thoughts,
+    db_job_detail = db.scalar(
+        insert(JobDetail)
+        .values(
+            application_id=application_id,
+            description=job_detail.description,
+            requirements=job_detail.requirements,
+            clean_text_content=job_detail.clean_text_content,
+            ai_thoughts=job_detail.ai_thoughts,
+        )
+        .returning(JobDetail)
     )
-    db.add(db_job_detail)
     db.commit()
-    db.refresh(db_job_detail)
     return db_job_detail
 
 
 @app.put("/applications/{application_id}/job-details", response_model=JobDetailResponse)
 def update_job_details(
-    application_id: int, job_detail: JobDetailUpdate, db: Session = Depends(get_db)
+    application_id: int,
+    job_detail: JobDetailUpdate,
+    db: Session = Depends(get_write_db),
 ):
     """Update job details for an application"""
-    db_job_detail = (
-        db.query(JobDetail).filter(JobDetail.application_id == application_id).first()
+    db_job_detail = db.scalar(
+        select(JobDetail).where(JobDetail.application_id == application_id)
     )
     if not db_job_detail:
         raise HTTPException(status_code=404, detail="Job details not found")
 
-    update_data = job_detail.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_job_detail, key, value)
+    for key in job_detail.model_fields_set:
+        setattr(db_job_detail, key, getattr(job_detail, key))
 
     db.commit()
     db.refresh(db_job_detail)
@@ -252,16 +610,22 @@ def update_job_details(
 # ============== Notes Endpoints ==============
 
 
-@app.get("/applications/{application_id}/notes", response_model=List[NoteResponse])
-def get_notes(application_id: int, db: Session = Depends(get_db)):
+@app.get(
+    "/applications/{application_id}/notes",
+    response_model=None,
+    responses={200: {"model": List[NoteResponse]}},
+)
+def get_notes(application_id: int, db: Session = Depends(get_read_db)):
     """Get all notes for an application"""
     notes = (
-        db.query(Note)
-        .filter(Note.application_id == application_id)
-        .order_by(Note.created_at.desc())
+        db.scalars(
+            select(Note)
+            .where(Note.application_id == application_id)
+            .order_by(Note.created_at.desc())
+        )
         .all()
     )
-    return notes
+    return list_response(NOTE_LIST_ADAPTER, notes)
 
 
 @app.post(
@@ -269,71 +633,72 @@ def get_notes(application_id: int, db: Session = Depends(get_db)):
     response_model=NoteResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_note(application_id: int, note: NoteCreate, db: Session = Depends(get_db)):
+def create_note(
+    application_id: int, note: NoteCreate, db: Session = Depends(get_write_db)
+):
     """Create a new note for an application"""
     # Check if application exists
-    application = db.query(Application).filter(Application.id == application_id).first()
+    application = find_application(db, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
-    db_note = Note(application_id=application_id, content=note.content)
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    db_note = db.scalar(
+        insert(Note)
+        .values(application_id=application_id, content=note.content)
+        .returning(Note)
+    )
 
     # Log note creation
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=application_id,
         activity_type="note_added",
         description="Added a new note",
     )
-    db.add(activity)
     db.commit()
 
     return db_note
 
 
 @app.put("/notes/{note_id}", response_model=NoteResponse)
-def update_note(note_id: int, note: NoteUpdate, db: Session = Depends(get_db)):
+def update_note(note_id: int, note: NoteUpdate, db: Session = Depends(get_write_db)):
     """Update an existing note"""
-    db_note = db.query(Note).filter(Note.id == note_id).first()
+    db_note = db.scalar(select(Note).where(Note.id == note_id))
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
 
     db_note.content = note.content
-    db.commit()
-    db.refresh(db_note)
 
     # Log note update
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=db_note.application_id,
         activity_type="note_updated",
         description="Updated a note",
     )
-    db.add(activity)
     db.commit()
+    db.refresh(db_note)
 
     return db_note
 
 
 @app.delete("/notes/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_note(note_id: int, db: Session = Depends(get_db)):
+def delete_note(note_id: int, db: Session = Depends(get_write_db)):
     """Delete a note"""
-    db_note = db.query(Note).filter(Note.id == note_id).first()
+    db_note = db.scalar(select(Note).where(Note.id == note_id))
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
 
     application_id = db_note.application_id
     db.delete(db_note)
-    db.commit()
 
     # Log note deletion
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=application_id,
         activity_type="note_deleted",
         description="Deleted a note",
     )
-    db.add(activity)
     db.commit()
 
     return None
@@ -344,34 +709,41 @@ def delete_note(note_id: int, db: Session = Depends(get_db)):
 
 @app.get(
     "/applications/{application_id}/activities",
-    response_model=List[ActivityLogResponse],
+    response_model=None,
+    responses={200: {"model": List[ActivityLogResponse]}},
 )
-def get_activities(application_id: int, db: Session = Depends(get_db)):
+def get_activities(application_id: int, db: Session = Depends(get_read_db)):
     """Get activity log for an application"""
     activities = (
-        db.query(ActivityLog)
-        .filter(ActivityLog.application_id == application_id)
-        .order_by(ActivityLog.created_at.desc())
+        db.scalars(
+            select(ActivityLog)
+            .where(ActivityLog.application_id == application_id)
+            .order_by(ActivityLog.created_at.desc())
+        )
         .all()
     )
-    return activities
+    return list_response(ACTIVITY_LIST_ADAPTER, activities)
 
 
 # ============== Deadline Endpoints ==============
 
 
 @app.get(
-    "/applications/{application_id}/deadlines", response_model=List[DeadlineResponse]
+    "/applications/{application_id}/deadlines",
+    response_model=None,
+    responses={200: {"model": List[DeadlineResponse]}},
 )
-def get_deadlines(application_id: int, db: Session = Depends(get_db)):
+def get_deadlines(application_id: int, db: Session = Depends(get_read_db)):
     """Get all deadlines for an application"""
     deadlines = (
-        db.query(Deadline)
-        .filter(Deadline.application_id == application_id)
-        .order_by(Deadline.deadline_date.asc())
+        db.scalars(
+            select(Deadline)
+            .where(Deadline.application_id == application_id)
+            .order_by(Deadline.deadline_date.asc())
+        )
         .all()
     )
-    return deadlines
+    return list_response(DEADLINE_LIST_ADAPTER, deadlines)
 
 
 @app.post(
@@ -380,94 +752,137 @@ def get_deadlines(application_id: int, db: Session = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
 )
 def create_deadline(
-    application_id: int, deadline: DeadlineCreate, db: Session = Depends(get_db)
+    application_id: int, deadline: DeadlineCreate, db: Session = Depends(get_write_db)
 ):
     """Create a new deadline for an application"""
     # Check if application exists
-    application = db.query(Application).filter(Application.id == application_id).first()
+    application = find_application(db, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
-    db_deadline = Deadline(
-        application_id=application_id,
-        deadline_type=deadline.deadline_type,
-        deadline_date=deadline.deadline_date,
-        description=deadline.description,
-        is_completed=1 if deadline.is_completed else 0,
+    db_deadline = db.scalar(
+        insert(Deadline)
+        .values(
+            application_id=application_id,
+            deadline_type=deadline.deadline_type,
+            deadline_date=deadline.deadline_date,
+            description=deadline.description,
+            is_completed=deadline.is_completed,
+        )
+        .returning(Deadline)
     )
-    db.add(db_deadline)
-    db.commit()
-    db.refresh(db_deadline)
 
     # Log deadline creation
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=application_id,
         activity_type="deadline_added",
         description=f'Added {deadline.deadline_type} deadline for {deadline.deadline_date.strftime("%Y-%m-%d")}',
     )
-    db.add(activity)
     db.commit()
 
     return db_deadline
 
 
+@app.post(
+    "/applications/{application_id}/deadlines/batch",
+    response_model=None,
+    responses={201: {"model": List[DeadlineResponse]}},
+    status_code=status.HTTP_201_CREATED,
+)
+def create_deadlines(
+    application_id: int,
+    deadlines: List[DeadlineCreate],
+    db: Session = Depends(get_write_db),
+):
+    """Create several deadlines for an application in one transaction"""
+    application = find_application(db, application_id)
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    db_deadlines = bulk_insert(
+        db,
+        Deadline,
+        [
+            dict(deadline.model_dump(), application_id=application_id)
+            for deadline in deadlines
+        ],
+    )
+    bulk_insert(
+        db,
+        ActivityLog,
+        [
+            {
+                "application_id": application_id,
+                "activity_type": "deadline_added",
+                "description": f'Added {deadline.deadline_type} deadline for {deadline.deadline_date.strftime("%Y-%m-%d")}',
+                "old_value": None,
+                "new_value": None,
+            }
+            for deadline in deadlines
+        ],
+        returning=False,
+    )
+    db.commit()
+
+    return list_response(DEADLINE_LIST_ADAPTER, db_deadlines, status.HTTP_201_CREATED)
+
+
 @app.put("/deadlines/{deadline_id}", response_model=DeadlineResponse)
 def update_deadline(
-    deadline_id: int, deadline: DeadlineUpdate, db: Session = Depends(get_db)
+    deadline_id: int, deadline: DeadlineUpdate, db: Session = Depends(get_write_db)
 ):
     """Update an existing deadline"""
-    db_deadline = db.query(Deadline).filter(Deadline.id == deadline_id).first()
+    db_deadline = db.scalar(select(Deadline).where(Deadline.id == deadline_id))
     if not db_deadline:
         raise HTTPException(status_code=404, detail="Deadline not found")
 
     # Track completion status change
-    old_completed = bool(db_deadline.is_completed)
+    old_completed = db_deadline.is_completed
 
     # Update fields
-    update_data = deadline.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
+    for key in deadline.model_fields_set:
+        value = getattr(deadline, key)
         if key == "is_completed":
-            setattr(db_deadline, key, 1 if value else 0)
-        else:
-            setattr(db_deadline, key, value)
-
-    db.commit()
-    db.refresh(db_deadline)
+            # An explicit null means not completed
+            value = bool(value)
+        setattr(db_deadline, key, value)
 
     # Log deadline completion if status changed
-    new_completed = bool(db_deadline.is_completed)
+    new_completed = db_deadline.is_completed
     if new_completed != old_completed:
-        activity = ActivityLog(
+        log_activity(
+            db,
             application_id=db_deadline.application_id,
             activity_type=(
                 "deadline_completed" if new_completed else "deadline_reopened"
             ),
             description=f'{db_deadline.deadline_type} deadline {"completed" if new_completed else "reopened"}',
         )
-        db.add(activity)
-        db.commit()
+
+    db.commit()
+    db.refresh(db_deadline)
 
     return db_deadline
 
 
 @app.delete("/deadlines/{deadline_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_deadline(deadline_id: int, db: Session = Depends(get_db)):
+def delete_deadline(deadline_id: int, db: Session = Depends(get_write_db)):
     """Delete a deadline"""
-    db_deadline = db.query(Deadline).filter(Deadline.id == deadline_id).first()
+    db_deadline = db.scalar(select(Deadline).where(Deadline.id == deadline_id))
     if not db_deadline:
         raise HTTPException(status_code=404, detail="Deadline not found")
 
     application_id = db_deadline.application_id
     db.delete(db_deadline)
-    db.commit()
 
     # Log deadline deletion
-    activity = ActivityLog(
+    log_activity(
+        db,
         application_id=application_id,
         activity_type="deadline_deleted",
         description="Deleted a deadline",
     )
-    db.add(activity)
     db.commit()
 
     return None
@@ -475,41 +890,82 @@ def delete_deadline(deadline_id: int, db: Session = Depends(get_db)):
 
 # ============== Export Endpoints ==============
 
+# Spreadsheet generation is CPU-bound Python, so it runs in worker processes
+# where it holds neither the event loop nor the GIL of the API process.
+# Workers are only started on the first export. They are spawned rather than
+# forked everywhere (as on Windows) so they don't inherit the pipes of the
+# Playwright driver, which would keep it from shutting down.
+#
+# A spawned worker re-runs the main script: with `python main.py` it imports
+# this module again as __mp_main__. That only builds the FastAPI app object;
+# the tables, the scraper and this pool are set up by the startup handlers,
+# which run in the API process alone.
+export_pool: Optional[ProcessPoolExecutor] = None
+
+
+@app.on_event("startup")
+def start_export_pool():
+    global export_pool
+    export_pool = ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    )
 
-@app.get("/export/excel")
-def export_to_excel(db: Session = Depends(get_db)):
-    """Export all applications to Excel"""
-    applications = db.query(Application).order_by(Application.created_at.desc()).all()
-
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Applications"
-
-    # Headers
-    headers = [
-        "ID",
-        "Company",
-        "Position",
-        "Location",
-        "Salary",
-        "Status",
-        "Date Applied",
-        "Deadline",
-        "Job URL",
-        "Latest Note",
-    ]
-    ws.append(headers)
 
-    # Data rows
-    for app in applications:
-        # Get the latest note if any
-        latest_note = ""
-        if app.notes:
-            latest_note = app.notes[0].content if len(app.notes) > 0 else ""
+@app.on_event("shutdown")
+def shutdown_export_pool():
+    export_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_process_pool(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(export_pool, fn, *args)
+
+
+def _export_rows(db: Session):
+    """Load applications as plain tuples that can be sent to a worker process"""
+    # Rank each application's notes newest first so the latest one can be
+    # joined in the same query rather than loading every note
+    latest_note = select(
+        Note.application_id,
+        Note.content,
+        func.row_number()
+        .over(
+            partition_by=Note.application_id,
+            order_by=(Note.created_at.desc(), Note.id.desc()),
+        )
+        .label("rn"),
+    ).subquery()
+
+    stmt = (
+        select(
+            Application.id,
+            Application.company_name,
+            Application.position_title,
+            Application.location,
+            Application.salary,
+            Application.status,
+            Application.date_applied,
+            Application.deadline,
+            Application.job_url,
+            latest_note.c.content,
+        )
+        .outerjoin(
+            latest_note,
+            and_(
+                latest_note.c.application_id == Application.id,
+                latest_note.c.rn == 1,
+            ),
+        )
+        .order_by(Application.created_at.desc())
+        # Fetch from the cursor in batches instead of buffering the whole
+        # result, only the plain tuples below are kept
+        .execution_options(yield_per=500)
+    )
 
-        ws.append(
-            [
+    rows = []
+    for app in db.execute(stmt):
+        rows.append(
+            (
                 app.id,
                 app.company_name,
                 app.position_title,
@@ -519,23 +975,50 @@ def export_to_excel(db: Session = Depends(get_db)):
                 app.date_applied.strftime("%Y-%m-%d") if app.date_applied else "",
                 app.deadline.strftime("%Y-%m-%d") if app.deadline else "",
                 app.job_url or "",
-                latest_note,
-            ]
+                app.content or "",
+            )
         )
+    return rows
 
-    # Save to BytesIO
-    excel_file = io.BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
 
-    return StreamingResponse(
-        excel_file,
+@app.get("/export/excel")
+async def export_to_excel(db: Session = Depends(get_read_db)):
+    """Export all applications to Excel"""
+    # The session is synchronous, so keep the query off the event loop too
+    rows = await run_in_threadpool(_export_rows, db)
+    excel_file = await run_in_process_pool(build_xlsx, rows)
+
+    return Response(
+        content=excel_file,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=applications.xlsx"},
     )
 
 
 if __name__ == "__main__":
+    import argparse
+
     import uvicorn
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the Application Tracker API")
+    parser.add_argument(
+        "--dev", action="store_true", help="single worker with auto-reload"
+    )
+    args = parser.parse_args()
+
+    # uvloop is POSIX-only; on Windows stay on asyncio so the selector event
+    # loop policy set above still applies
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+
+    if args.dev:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, loop=loop, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=WORKERS,
+            loop=loop,
+            http="httptools",
+            log_level="warning",
+        )
@@ -1,10 +1,32 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.database import Base
+from collections import OrderedDict
+from datetime import datetime, timezone
+import threading
+
+
+def utcnow():
+    """
+    Current time as naive UTC, the form CURRENT_TIMESTAMP stored before
+    timestamps were set in Python, so old and new rows compare and sort alike.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Application.to_dict() payloads keyed by (id, updated_at). updated_at changes
+# on every write to the row, so an entry never outlives the version it was
+# built from; the list endpoint reuses it until then.
+APPLICATION_PAYLOAD_CACHE_SIZE = 4096
+_application_payloads = OrderedDict()
+_application_payloads_lock = threading.Lock()
+
 
 class Application(Base):
     __tablename__ = "applications"
+    # Serves "WHERE status = ? ORDER BY created_at DESC" on the list endpoint
+    # without a sort step; also covers lookups by status alone
+    __table_args__ = (Index("ix_applications_status_created", "status", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     company_name = Column(String(255), nullable=False, index=True)
@@ -12,11 +34,12 @@ class Application(Base):
     location = Column(String(255), nullable=True)
     salary = Column(String(100), nullable=True)
     job_url = Column(Text, nullable=True)
-    status = Column(String(50), default='Applied', nullable=False, index=True)
-    date_applied = Column(DateTime, server_default=func.now())
+    status = Column(String(50), default='Applied', nullable=False)
+    date_applied = Column(DateTime, default=utcnow)
     deadline = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, default=utcnow)
+    # Microsecond resolution matters here: the payload cache keys on it
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     # Relationships
     job_details = relationship("JobDetail", back_populates="application", uselist=False, cascade="all, delete-orphan")
@@ -25,19 +48,31 @@ class Application(Base):
     deadlines = relationship("Deadline", back_populates="application", cascade="all, delete-orphan", order_by="Deadline.deadline_date.asc()")
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'company_name': self.company_name,
-            'position_title': self.position_title,
-            'job_url': self.job_url,
-            'location': self.location,
-            'salary': self.salary,
-            'status': self.status,
-            'date_applied': self.date_applied.isoformat() if self.date_applied else None,
-            'deadline': self.deadline.isoformat() if self.deadline else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-        }
+        key = (self.id, self.updated_at)
+        with _application_payloads_lock:
+            payload = _application_payloads.get(key)
+            if payload is not None:
+                _application_payloads.move_to_end(key)
+        if payload is None:
+            payload = {
+                'id': self.id,
+                'company_name': self.company_name,
+                'position_title': self.position_title,
+                'job_url': self.job_url,
+                'location': self.location,
+                'salary': self.salary,
+                'status': self.status,
+                'date_applied': self.date_applied,
+                'deadline': self.deadline,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+            }
+            with _application_payloads_lock:
+                _application_payloads[key] = payload
+                if len(_application_payloads) > APPLICATION_PAYLOAD_CACHE_SIZE:
+                    _application_payloads.popitem(last=False)
+        # Callers add the related rows to the dict they get back
+        return dict(payload)
 
 
 class JobDetail(Base):
@@ -49,8 +84,8 @@ class JobDetail(Base):
     requirements = Column(Text, nullable=True)
     clean_text_content = Column(Text, nullable=True)  # Store cleaned text from HTML
     ai_thoughts = Column(Text, nullable=True)  # AI-generated advice on how to stand out
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     # Relationship
     application = relationship("Application", back_populates="job_details")
@@ -63,19 +98,21 @@ class JobDetail(Base):
             'requirements': self.requirements,
             'clean_text_content': self.clean_text_content,
             'ai_thoughts': self.ai_thoughts,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
 
 class Note(Base):
     __tablename__ = "notes"
+    # Matches the "WHERE application_id = ? ORDER BY ..." list queries
+    __table_args__ = (Index("ix_notes_app_created", "application_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False, index=True)
+    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False)
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     # Relationship
     application = relationship("Application", back_populates="notes")
@@ -85,21 +122,23 @@ class Note(Base):
             'id': self.id,
             'application_id': self.application_id,
             'content': self.content,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
 
 class ActivityLog(Base):
     __tablename__ = "activity_log"
+    # Matches the "WHERE application_id = ? ORDER BY ..." list queries
+    __table_args__ = (Index("ix_activity_log_app_created", "application_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False, index=True)
+    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False)
     activity_type = Column(String(50), nullable=False)  # status_change, interview, note, deadline_set, etc.
     description = Column(Text, nullable=True)
     old_value = Column(Text, nullable=True)  # For tracking changes (e.g., old status)
     new_value = Column(Text, nullable=True)  # New value
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, default=utcnow)
 
     # Relationship
     application = relationship("Application", back_populates="activities")
@@ -112,21 +151,23 @@ class ActivityLog(Base):
             'description': self.description,
             'old_value': self.old_value,
             'new_value': self.new_value,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
 
 class Deadline(Base):
     __tablename__ = "deadlines"
+    # Matches the "WHERE application_id = ? ORDER BY ..." list queries
+    __table_args__ = (Index("ix_deadlines_app_deadline_date", "application_id", "deadline_date"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False, index=True)
+    application_id = Column(Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False)
     deadline_type = Column(String(50), nullable=False)  # application, interview, assessment, follow_up, etc.
     deadline_date = Column(DateTime, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    is_completed = Column(Integer, default=0)  # 0 = pending, 1 = completed (SQLite doesn't have boolean)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    is_completed = Column(Boolean, default=False, nullable=False, index=True)  # Stored as INTEGER 0/1 in SQLite
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     # Relationship
     application = relationship("Application", back_populates="deadlines")
@@ -136,9 +177,9 @@ class Deadline(Base):
             'id': self.id,
             'application_id': self.application_id,
             'deadline_type': self.deadline_type,
-            'deadline_date': self.deadline_date.isoformat() if self.deadline_date else None,
+            'deadline_date': self.deadline_date,
             'description': self.description,
-            'is_completed': bool(self.is_completed),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'is_completed': self.is_completed,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
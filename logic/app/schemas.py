@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
@@ -39,8 +39,7 @@ class ApplicationResponse(ApplicationBase):
     deadlines: Optional[List["DeadlineResponse"]] = []
     job_details: Optional["JobDetailResponse"] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============== JobDetail Schemas ==============
@@ -67,8 +66,7 @@ class JobDetailResponse(JobDetailBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============== Note Schemas ==============
@@ -92,8 +90,7 @@ class NoteResponse(NoteBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============== ActivityLog Schemas ==============
@@ -115,8 +112,7 @@ class ActivityLogResponse(ActivityLogBase):
     application_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============== Deadline Schemas ==============
@@ -146,8 +142,7 @@ class DeadlineResponse(DeadlineBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============== Scraping Schemas ==============
@@ -155,6 +150,7 @@ class DeadlineResponse(DeadlineBase):
 
 class ScrapeRequest(BaseModel):
     url: str
+    refresh: bool = False  # Ignore any cached result and scrape again
 
 
 class ScrapeResponse(BaseModel):
@@ -168,7 +164,33 @@ class ScrapeResponse(BaseModel):
     clean_text_content: Optional[str] = None
     ai_thoughts: Optional[str] = None
     application_deadline: Optional[str] = None
+    scrape_error: Optional[str] = None
+
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=20)
+    refresh: bool = False
+
+
+class ScrapeImportRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=500)
+    refresh: bool = False
+
+
+class BatchScrapeResult(BaseModel):
+    url: str
+    data: Optional[ScrapeResponse] = None
+    error: Optional[str] = None
 
 
 # Resolve forward references
 ApplicationResponse.model_rebuild()
+
+# ============== List Adapters ==============
+
+# Validate a whole list of ORM rows and dump it to JSON bytes in one call
+# into pydantic-core, instead of per-item dicts re-encoded by FastAPI
+APPLICATION_LIST_ADAPTER = TypeAdapter(List[ApplicationResponse])
+NOTE_LIST_ADAPTER = TypeAdapter(List[NoteResponse])
+ACTIVITY_LIST_ADAPTER = TypeAdapter(List[ActivityLogResponse])
+DEADLINE_LIST_ADAPTER = TypeAdapter(List[DeadlineResponse])
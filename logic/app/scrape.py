@@ -1,19 +1,560 @@
-from bs4 import BeautifulSoup
-from typing import Dict, Optional
-import os
+from typing import Dict, List, NamedTuple, Optional, Union
+from contextlib import asynccontextmanager
 from pathlib import Path
-from dotenv import load_dotenv
 import json
-from playwright.async_api import async_playwright
+import aiofiles
+import aiofiles.os
+import orjson
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import google.generativeai as genai
-import re
+from google.api_core import exceptions as google_exceptions
 import asyncio
 import hashlib
+import itertools
+import random
+import time
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from app.config import CACHE_DIR, GOOGLE_API_KEYS, SCRAPE_CONCURRENCY
+
+# Pages rendered at the same time in the shared browser
+MAX_CONCURRENT_PAGES = 3
+
+# Opening a browser context costs a few hundred milliseconds, so one per
+# concurrent page is kept open and reused; each is replaced after this many
+# pages to bound what it accumulates
+CONTEXT_MAX_USES = 50
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Fields Gemini extracts from a posting. Every one is a string; all but
+# ai_thoughts may be null when the text does not say.
+JOB_FIELDS = (
+    "company_name",
+    "position_title",
+    "location",
+    "salary",
+    "description",
+    "requirements",
+    "application_deadline",
+    "ai_thoughts",
+)
+
+# Structured output: Gemini answers with a bare JSON object that the API
+# has already checked against this schema
+JOB_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        field: {"type": "STRING", "nullable": field != "ai_thoughts"}
+        for field in JOB_FIELDS
+    },
+    "required": list(JOB_FIELDS),
+}
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": JOB_RESPONSE_SCHEMA,
+}
+
+# Most page text sent to Gemini, in estimated tokens. Longer pages lose
+# their middle: the head holds the title and summary, the tail usually the
+# application instructions and deadline.
+MAX_TEXT_TOKENS = 10_000
+TRUNCATED_HEAD_SHARE = 4 / 7  # of the kept text; the rest is the tail
+_TRUNCATION_MARKER = "\n...(middle of the page truncated)...\n"
+
+# Pages with less text than this, or showing one of these signals, are
+# error pages or bot walls. Sending them to Gemini only spends quota.
+MIN_CLEAN_TEXT_CHARS = 500
+_BLOCKED_PAGE_SIGNALS = (
+    "please enable javascript",
+    "403 forbidden",
+    "verify you are human",
+    "checking your browser",
+)
+
+# Part of the extraction cache key. Bump it whenever _build_prompt or the
+# schema changes, so answers to the old prompt are not reused.
+PROMPT_VERSION = 2
+
+# Gemini answers are reused for this long after they were written, and at
+# most this many are kept (about 1 KB each); the oldest go first. The cap is
+# enforced at startup and after every LLM_CACHE_PRUNE_EVERY new answers.
+LLM_CACHE_DURATION = timedelta(days=30)
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_PRUNE_EVERY = 100
+
+# Lighter models to fall back on, in order, when a model keeps returning
+# server errors, so a Flash outage does not fail the scrape
+GEMINI_FALLBACK_MODELS = ("gemini-2.5-flash-lite", "gemini-2.0-flash")
+SERVER_ERROR_ATTEMPTS = 2  # tries per model before falling back
+
+# Backoff between Gemini retries doubles from BACKOFF_BASE_DELAY seconds up to
+# BACKOFF_MAX_DELAY, then a random wait of one to two times that is taken
+BACKOFF_BASE_DELAY = 5
+BACKOFF_MAX_DELAY = 60
+
+# Seconds an API key rests after hitting its rate limit while the other
+# keys take its requests
+API_KEY_COOLDOWN = 60
+
+# Gemini Batch API, used for large imports: half the per-request price, but
+# results arrive minutes to hours later, so interactive scrapes never use it
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+# Inline batch requests are capped at about 20 MB, which a full import of
+# long pages exceeds, so the prompts are uploaded as a JSONL file instead
+GEMINI_UPLOAD_URL = "https://generativelanguage.googleapis.com/upload/v1beta/files"
+GEMINI_DOWNLOAD_URL = "https://generativelanguage.googleapis.com/download/v1beta"
+BATCH_API_MIN_URLS = 10  # smaller imports just call Gemini per URL
+BATCH_POLL_INTERVAL = 30  # seconds between batch job status checks
+
+# Subresources a page never needs for its text. Aborting them keeps pages
+# from downloading images, fonts and stylesheets during the render.
+_BLOCKED_RESOURCE_TYPES = {
+    "image",
+    "media",
+    "font",
+    "stylesheet",
+    "websocket",
+    "manifest",
+}
+
+# Ad and analytics hosts, blocked along with their subdomains. Their scripts
+# and iframes are a large share of a job page's requests and never carry
+# posting text.
+_BLOCKED_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "criteo.com",
+    "facebook.net",
+    "hotjar.com",
+    "scorecardresearch.com",
+)
+
+# Elements whose text is never part of the job posting
+_NOISE_TAGS = ("script", "style", "noscript", "nav", "footer", "header")
+
+
+def _attr_contains(attr: str, first: str, second: str) -> str:
+    """
+    CSS selector equivalent to matching @attr against
+    re.compile(rf"{first}[-_]?{second}", re.I).
+    """
+    return ", ".join(
+        f'[{attr}*="{first}{sep}{second}" i]' for sep in ("", "-", "_")
+    )
+
+
+# Common job posting containers, most specific first
+_MAIN_CONTENT_SELECTORS = [
+    _attr_contains("class", "job", "description"),
+    _attr_contains("class", "job", "detail"),
+    _attr_contains("class", "job", "content"),
+    _attr_contains("id", "job", "description"),
+    _attr_contains("id", "job", "detail"),
+    "[role=main]",
+    _attr_contains("class", "main", "content"),
+]
+
+# Single-page job boards (Greenhouse, Lever, Workday) fill in the posting
+# after domcontentloaded. Wait this long for a job container to render, then
+# as long again for the network to go quiet, before reading the page.
+CONTENT_WAIT_MS = 5000
+_MAIN_CONTENT_SELECTOR = ", ".join(_MAIN_CONTENT_SELECTORS)
+
+# Runs inside the page, so only the posting's text and JSON-LD cross the
+# Playwright pipe instead of the whole rendered HTML. Takes the main content
+# selectors and noise tags above; returns {"jsonld": [...], "text": "..."}
+# with one trimmed text node per line.
+_EXTRACT_PAGE_JS = """
+([selectors, noiseTags]) => {
+    const jsonld = Array.from(
+        document.querySelectorAll('script[type="application/ld+json"]'),
+        (script) => script.textContent
+    );
+
+    const noise = noiseTags.join(",");
+    let main = null;
+    for (const selector of selectors) {
+        main = Array.from(document.querySelectorAll(selector)).find(
+            (element) => !element.closest(noise)
+        );
+        if (main) break;
+    }
+    main = main || document.body || document.documentElement;
+
+    const skip = new Set(noiseTags.map((tag) => tag.toUpperCase()));
+    const walker = document.createTreeWalker(
+        main,
+        NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT,
+        {
+            acceptNode: (node) =>
+                node.nodeType === Node.ELEMENT_NODE && skip.has(node.tagName)
+                    ? NodeFilter.FILTER_REJECT
+                    : NodeFilter.FILTER_ACCEPT,
+        }
+    );
+    const parts = [];
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        if (node.nodeType === Node.TEXT_NODE) {
+            const text = node.textContent.trim();
+            if (text) parts.push(text);
+        }
+    }
+    return { jsonld, text: parts.join("\\n") };
+}
+"""
+
+# Query parameters that only track where a click came from. Dropping them
+# lets the same posting shared through different links hit one cache entry.
+_TRACKING_PARAMS = {
+    "gclid",
+    "fbclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "trk",
+    "trackingId",
+    "refId",
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a job URL for cache keys: lowercase scheme and host,
+    no fragment, no tracking parameters, remaining parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), "")
+    )
+
+
+def _iter_jsonld_nodes(data):
+    """Yield every object in a JSON-LD document, including @graph members."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_jsonld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        yield from _iter_jsonld_nodes(data.get("@graph"))
+
+
+def _find_job_posting(scripts: List[str]) -> Optional[dict]:
+    """
+    Return the first schema.org JobPosting among the page's JSON-LD scripts,
+    the structured job data many boards embed for search engines.
+    """
+    for script in scripts:
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        for node in _iter_jsonld_nodes(data):
+            node_type = node.get("@type")
+            if node_type == "JobPosting" or (
+                isinstance(node_type, list) and "JobPosting" in node_type
+            ):
+                return node
+    return None
+
+
+def _jsonld_text(value) -> Optional[str]:
+    """A JSON-LD value as stripped text; objects contribute their name."""
+    if isinstance(value, dict):
+        value = value.get("name")
+    if isinstance(value, (str, int, float)) and str(value).strip():
+        return str(value).strip()
+    return None
+
+
+def _job_posting_location(posting: dict) -> Optional[str]:
+    """Join the posting's job locations as "City, Region, Country; ..."."""
+    if posting.get("jobLocationType") == "TELECOMMUTE":
+        return "Remote"
+    locations = posting.get("jobLocation")
+    if not isinstance(locations, list):
+        locations = [locations]
+
+    places = []
+    for location in locations:
+        address = location.get("address") if isinstance(location, dict) else location
+        if isinstance(address, dict):
+            parts = (
+                _jsonld_text(address.get(key))
+                for key in ("addressLocality", "addressRegion", "addressCountry")
+            )
+            place = ", ".join(part for part in parts if part)
+        else:
+            place = _jsonld_text(address)
+        if place and place not in places:
+            places.append(place)
+    return "; ".join(places) or None
+
+
+def _job_posting_salary(posting: dict) -> Optional[str]:
+    """Format baseSalary as e.g. "GBP 40000-50000 per year"."""
+    salary = posting.get("baseSalary")
+    if not isinstance(salary, dict):
+        return _jsonld_text(salary)
+
+    value = salary.get("value")
+    unit = None
+    if isinstance(value, dict):
+        unit = _jsonld_text(value.get("unitText"))
+        low, high = value.get("minValue"), value.get("maxValue")
+        if low is not None and high is not None:
+            value = f"{low}-{high}"
+        else:
+            value = next(
+                (v for v in (value.get("value"), low, high) if v is not None), None
+            )
+    amount = _jsonld_text(value)
+    if amount is None:
+        return None
+    currency = _jsonld_text(salary.get("currency"))
+    per_unit = f"per {unit.lower()}" if unit else None
+    return " ".join(part for part in (currency, amount, per_unit) if part)
+
+
+def _job_posting_fields(posting: dict) -> Dict[str, str]:
+    """
+    Map a JobPosting onto scrape result keys. Only fields the posting
+    actually provides are returned, so they can override the model's guesses.
+    """
+    valid_through = _jsonld_text(posting.get("validThrough"))
+    fields = {
+        "position_title": _jsonld_text(posting.get("title")),
+        "company_name": _jsonld_text(posting.get("hiringOrganization")),
+        "location": _job_posting_location(posting),
+        "salary": _job_posting_salary(posting),
+        # validThrough is an ISO 8601 date or datetime; keep the date
+        "application_deadline": valid_through[:10] if valid_through else None,
+    }
+    return {key: value for key, value in fields.items() if value}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """The HTTP status of a failed Gemini call, if the error carries one"""
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    """
+    Whether a Gemini call was refused for quota (429). Checked on the error
+    type and status code, not on digits in the message, which may quote
+    limits such as "limit: 1500".
+    """
+    return (
+        isinstance(error, google_exceptions.TooManyRequests)
+        or _status_code(error) == 429
+        or "resource has been exhausted" in str(error).lower()
+    )
+
+
+def _is_server_error(error: Exception) -> bool:
+    """
+    Whether a Gemini call failed on Google's side (5xx), not on the request.
+    """
+    code = _status_code(error)
+    return isinstance(error, google_exceptions.ServerError) or (
+        code is not None and 500 <= code < 600
+    )
+
+
+def _backoff_delay(retry: int) -> float:
+    """
+    Seconds to wait before the given retry (counting from 0). The jitter
+    spreads out concurrent scrapes that were rate limited together, instead
+    of having them all retry at the same moment and collide again.
+    """
+    base = min(BACKOFF_MAX_DELAY, BACKOFF_BASE_DELAY * 2**retry)
+    return random.uniform(base, base * 2)
+
+
+def _is_blocked(request) -> bool:
+    if request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(request.url).hostname or ""
+    return any(
+        host == domain or host.endswith("." + domain) for domain in _BLOCKED_DOMAINS
+    )
+
+
+async def _block_unneeded_resources(route):
+    if _is_blocked(route.request):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count without an API call: about four ASCII
+    characters per token, and a token for every other character, which
+    keeps the estimate on the safe side for non-English text.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // 4 + (len(text) - ascii_chars)
 
-# Load environment variables
-env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(dotenv_path=env_path)
+
+def _truncate_middle(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about max_tokens by dropping whole lines from its middle.
+    """
+    tokens = _estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = len(text) * max_tokens // tokens
+    head_end = int(keep * TRUNCATED_HEAD_SHARE)
+    tail_start = len(text) - (keep - head_end)
+    # Cut at line boundaries so no line is left half-read
+    cut = text.rfind("\n", 0, head_end)
+    if cut > 0:
+        head_end = cut
+    cut = text.find("\n", tail_start)
+    if cut != -1:
+        tail_start = cut + 1
+    return text[:head_end] + _TRUNCATION_MARKER + text[tail_start:]
+
+
+def _unusable_page_reason(clean_text: str) -> Optional[str]:
+    """
+    Why a page's text cannot hold a job posting, or None if it can.
+    """
+    if len(clean_text) < MIN_CLEAN_TEXT_CHARS:
+        return "The page has too little text to contain a job posting."
+    lowered = clean_text.lower()
+    if any(signal in lowered for signal in _BLOCKED_PAGE_SIGNALS):
+        return "The page is blocked or needs a browser check."
+    return None
+
+
+class ScrapedPage(NamedTuple):
+    """What scraping keeps from a rendered page, ready for Gemini."""
+
+    clean_text: str
+    job_posting: Optional[dict]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def content_sha(self) -> str:
+        """Fingerprint of everything a scrape result is built from."""
+        digest = hashlib.sha256(self.clean_text.encode())
+        if self.job_posting is not None:
+            digest.update(orjson.dumps(self.job_posting, option=orjson.OPT_SORT_KEYS))
+        return digest.hexdigest()
+
+
+class BrowserPool:
+    """
+    One Playwright driver and headless Chromium shared by every scrape, with
+    a pool of open BrowserContexts. A context serves one page at a time and
+    has its cookies cleared between pages.
+    """
+
+    def __init__(self, size: int, **context_options):
+        self._playwright = None
+        self._browser = None
+        self._size = size
+        self._context_options = context_options
+        self._idle = asyncio.Queue()  # (context, pages served)
+        # Concurrent scrapes arriving before the browser is up must not each
+        # launch one
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """
+        Launch the browser and open the pool's contexts, or relaunch it if
+        it has crashed.
+        """
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            # Contexts of a crashed browser are gone with it
+            while not self._idle.empty():
+                self._idle.get_nowait()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            for _ in range(self._size):
+                self._idle.put_nowait((await self._new_context(), 0))
+
+    async def _new_context(self):
+        context = await self._browser.new_context(**self._context_options)
+        # Routed on the context so popups the page opens are covered too
+        await context.route("**/*", _block_unneeded_resources)
+        return context
+
+    @asynccontextmanager
+    async def context(self):
+        """
+        Borrow a pooled context for one page; it is returned on exit.
+        """
+        if self._browser is None or not self._browser.is_connected():
+            await self.start()
+        try:
+            context, uses = self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            context, uses = await self._new_context(), 0
+        try:
+            yield context
+        finally:
+            await self._release(context, uses + 1)
+
+    async def _release(self, context, uses: int):
+        reusable = (
+            uses < CONTEXT_MAX_USES
+            and self._idle.qsize() < self._size
+            and self._browser is not None
+            and self._browser.is_connected()
+        )
+        try:
+            if reusable:
+                await context.clear_cookies()
+                self._idle.put_nowait((context, uses))
+                return
+            await context.close()
+        except Exception:
+            # The context died with its page; a new one replaces it
+            return
+        if self._browser is not None and self._browser.is_connected():
+            if self._idle.qsize() < self._size:
+                self._idle.put_nowait((await self._new_context(), 0))
+
+    async def close(self):
+        """
+        Close the pooled contexts, the browser and the Playwright driver.
+        """
+        async with self._lock:
+            while not self._idle.empty():
+                context, _ = self._idle.get_nowait()
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
 
 
 class JobScraper:
@@ -21,129 +562,737 @@ class JobScraper:
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self.google_api_key = os.getenv("GOOGLE_API_KEY")
-        self.cache_dir = Path(__file__).parent.parent / "cache" / "scrape_cache"
+        self.api_keys = GOOGLE_API_KEYS
+        self.cache_dir = CACHE_DIR / "scrape_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Gemini answers by page content, shared by every URL that shows the
+        # same posting text, for as long as the prompt is unchanged and the
+        # answer is younger than LLM_CACHE_DURATION
+        self.llm_cache_dir = CACHE_DIR / "llm_cache"
+        self.llm_cache_dir.mkdir(parents=True, exist_ok=True)
+        self._llm_cache_writes = 0
         self.cache_duration = timedelta(hours=24)  # Cache scrapes for 24 hours
 
-        if self.google_api_key:
-            genai.configure(api_key=self.google_api_key)
-        else:
+        # Plain HTTP session for revalidating expired cache entries: a 304
+        # from the origin is far cheaper than a browser render plus Gemini
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Keep connections to many job boards open across revalidations, and
+        # retry dropped connections briefly before falling back to a scrape
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.3),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # One browser is shared by all scrapes in this process, with a context
+        # ready for every page that may render at once
+        self.browser_pool = BrowserPool(
+            MAX_CONCURRENT_PAGES, user_agent=self.headers["User-Agent"]
+        )
+        self._page_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+        # Shared by all batches in this process, so concurrent batch requests
+        # together stay within the Gemini rate limit (see WORKERS in config)
+        self.concurrency = SCRAPE_CONCURRENCY
+        self._scrape_semaphore = asyncio.Semaphore(self.concurrency)
+
+        # Requests rotate round-robin over the keys, skipping any that is
+        # cooling down after a rate limit
+        self._key_cycle = itertools.cycle(self.api_keys)
+        self._key_cooldowns = dict.fromkeys(self.api_keys, 0.0)
+        self._gemini_models = {}  # (API key, model name) -> model bound to that key
+
+        if not self.api_keys:
             print(
                 "Warning: GOOGLE_API_KEY not found in .env file. Gemini scraping will not work."
             )
 
-    async def scrape_url(self, url: str) -> Dict[str, Optional[str]]:
+    async def start(self):
+        """
+        Launch the shared headless browser and open its contexts ahead of
+        the first scrape, after dropping stale Gemini answers.
+        """
+        await asyncio.to_thread(self._prune_llm_cache)
+        await self.browser_pool.start()
+
+    async def close(self):
+        """
+        Shut down the shared browser and the Playwright driver.
+        """
+        await self.browser_pool.close()
+
+    async def scrape_url(
+        self, url: str, refresh: bool = False
+    ) -> Dict[str, Optional[str]]:
         """
         Scrape job details from a given URL using an AI model.
         1. Fetches the HTML content
         2. Extracts clean text from the main content area
         3. Sends to OpenAI for structured extraction
+        Pass refresh=True to ignore cached results, both the page's and
+        Gemini's answer for its text, and scrape again.
         """
         try:
-            # --- Caching Logic ---
-            url_hash = hashlib.sha256(url.encode()).hexdigest()
-            cache_file = self.cache_dir / f"{url_hash}.json"
-
-            # Check for a valid cache file
-            if cache_file.exists():
-                file_mod_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                if datetime.now() - file_mod_time < self.cache_duration:
-                    print(f"Cache hit for URL: {url}")
-                    with open(cache_file, "r", encoding="utf-8") as f:
-                        return json.load(f)
+            cache_file = self._cache_file(url)
+            entry = None if refresh else await self._read_cache(cache_file)
+            cached = await self._cached_result(url, cache_file, entry)
+            if cached is not None:
+                return cached
 
             print(f"Cache miss for URL: {url}")
+            page = await self._fetch_page(url)
+            cached = self._unchanged_result(url, cache_file, entry, page)
+            if cached is not None:
+                return cached
 
-            # Fetch the HTML content using Playwright
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page(user_agent=self.headers["User-Agent"])
-                await page.goto(url, timeout=20000, wait_until="domcontentloaded")
-                content = await page.content()
-                await browser.close()
+            scrape_error = _unusable_page_reason(page.clean_text)
+            if scrape_error is not None:
+                return self._unusable_result(url, page, scrape_error)
 
-            # Parse HTML and extract clean text
-            soup = BeautifulSoup(content, "html.parser")
-            clean_text = self._extract_clean_text(soup)
+            # Use Gemini to extract structured data
+            job_data = await self._extract_with_gemini(page.clean_text, url, refresh)
+            return await self._save_result(cache_file, page, job_data)
 
-            # Use OpenAI to extract structured data
-            job_data = await self._extract_with_gemini(clean_text, url)
+        except Exception as e:
+            raise Exception(f"Failed to scrape URL: {str(e)}")
 
-            # Add the clean text content to the result
-            job_data["clean_text_content"] = clean_text
+    def _cache_file(self, url: str) -> Path:
+        url_hash = hashlib.sha256(normalize_url(url).encode()).hexdigest()
+        return self.cache_dir / f"{url_hash}.json"
 
-            # Save result to cache
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(job_data, f, ensure_ascii=False, indent=4)
+    async def _cached_result(
+        self, url: str, cache_file: Path, cached: Optional[dict]
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        The result from a URL's cache entry if it is fresh, or expired but
+        confirmed unchanged by the origin; None when the page must be fetched.
+        """
+        if cached is None:
+            return None
 
-            return job_data
+        stat = await aiofiles.os.stat(cache_file)
+        file_mod_time = datetime.fromtimestamp(stat.st_mtime)
+        if datetime.now() - file_mod_time < self.cache_duration:
+            print(f"Cache hit for URL: {url}")
+            return cached["result"]
 
-        except Exception as e:
-            raise Exception(f"Failed to scrape URL: {str(e)}")
+        # Expired: ask the origin whether the page changed since
+        if await asyncio.to_thread(self._is_unchanged, url, cached):
+            print(f"Cache revalidated for URL: {url}")
+            cache_file.touch()
+            return cached["result"]
+        return None
 
-    def _extract_clean_text(self, soup: BeautifulSoup) -> str:
+    def _unchanged_result(
+        self, url: str, cache_file: Path, cached: Optional[dict], page: ScrapedPage
+    ) -> Optional[Dict[str, Optional[str]]]:
         """
-        Extract clean text content from HTML, removing navigation, ads, etc.
+        The cached result if the freshly fetched page has the same content it
+        was built from. Many origins send no validators, or change them on
+        every response, so this is what saves the Gemini call for them.
         """
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
+        if cached is None or cached.get("content_sha") != page.content_sha:
+            return None
+        print(f"Page content unchanged for URL: {url}")
+        cache_file.touch()
+        return cached["result"]
 
-        # Try to find the main content area
-        # Look for common job posting containers
-        main_content = None
+    async def _fetch_page(self, url: str) -> ScrapedPage:
+        """
+        Render a URL in the shared browser and extract its clean text and
+        any embedded JobPosting data.
+        """
+        async with self._page_semaphore, self.browser_pool.context() as context:
+            page = await context.new_page()
+            try:
+                response = await page.goto(
+                    url, timeout=20000, wait_until="domcontentloaded"
+                )
+                await self._wait_for_content(page)
+                extracted = await page.evaluate(
+                    _EXTRACT_PAGE_JS, [_MAIN_CONTENT_SELECTORS, list(_NOISE_TAGS)]
+                )
+            finally:
+                await page.close()
 
-        # Try common job posting selectors
-        selectors = [
-            {"class": re.compile(r"job[-_]?description", re.I)},
-            {"class": re.compile(r"job[-_]?detail", re.I)},
-            {"class": re.compile(r"job[-_]?content", re.I)},
-            {"id": re.compile(r"job[-_]?description", re.I)},
-            {"id": re.compile(r"job[-_]?detail", re.I)},
-            {"role": "main"},
-            {"class": re.compile(r"main[-_]?content", re.I)},
-        ]
+        # Validators for revalidating the cache entry once it expires
+        response_headers = response.headers if response is not None else {}
 
-        for selector in selectors:
-            main_content = soup.find(attrs=selector)
-            if main_content:
-                break
+        return ScrapedPage(
+            clean_text=self._extract_clean_text(extracted["text"]),
+            job_posting=_find_job_posting(extracted["jsonld"]),
+            etag=response_headers.get("etag"),
+            last_modified=response_headers.get("last-modified"),
+        )
 
-        # If no main content found, use the body
-        if not main_content:
-            main_content = soup.find("body")
+    async def _wait_for_content(self, page):
+        """
+        Give script-rendered postings time to appear. Pages that never show a
+        known container get a bounded wait for network idle instead; either
+        way the page is read afterwards with whatever it has.
+        """
+        try:
+            await page.wait_for_selector(_MAIN_CONTENT_SELECTOR, timeout=CONTENT_WAIT_MS)
+        except PlaywrightTimeoutError:
+            try:
+                await page.wait_for_load_state("networkidle", timeout=CONTENT_WAIT_MS)
+            except PlaywrightTimeoutError:
+                pass
 
-        if not main_content:
-            main_content = soup
+    def _unusable_result(
+        self, url: str, page: ScrapedPage, scrape_error: str
+    ) -> Dict[str, Optional[str]]:
+        """
+        The result for a page not worth sending to Gemini: only what its
+        JSON-LD provides, flagged with scrape_error. Not cached, so a later
+        scrape can succeed once the page loads properly.
+        """
+        job_data = dict.fromkeys(JOB_FIELDS)
+        job_data["job_url"] = url
+        if page.job_posting is not None:
+            job_data.update(_job_posting_fields(page.job_posting))
+        job_data["clean_text_content"] = page.clean_text
+        job_data["scrape_error"] = scrape_error
+        return job_data
+
+    async def _save_result(
+        self, cache_file: Path, page: ScrapedPage, job_data: dict
+    ) -> Dict[str, Optional[str]]:
+        """
+        Complete Gemini's extraction with the page's own data and cache it.
+        """
+        # Fields the page publishes as structured data are exact, so they
+        # take precedence over what the model read from the text
+        if page.job_posting is not None:
+            job_data.update(_job_posting_fields(page.job_posting))
+
+        # Add the clean text content to the result
+        job_data["clean_text_content"] = page.clean_text
+
+        # Save result to cache
+        cache_entry = {
+            "etag": page.etag,
+            "last_modified": page.last_modified,
+            "content_sha": page.content_sha,
+            "result": job_data,
+        }
+        async with aiofiles.open(cache_file, "wb") as f:
+            await f.write(orjson.dumps(cache_entry, option=orjson.OPT_INDENT_2))
 
-        # Get text and clean it up
-        text = main_content.get_text(separator="\n", strip=True)
+        return job_data
+
+    async def _read_cache(self, cache_file: Path) -> Optional[dict]:
+        """
+        Load a cache entry as {"etag", "last_modified", "content_sha",
+        "result"}, or None if
+        there is no usable file. Entries written before validators were
+        stored hold the bare result.
+        """
+        try:
+            async with aiofiles.open(cache_file, "rb") as f:
+                entry = orjson.loads(await f.read())
+        except (OSError, ValueError):
+            return None
+        if "result" not in entry:
+            entry = {"etag": None, "last_modified": None, "result": entry}
+        return entry
+
+    def _is_unchanged(self, url: str, cached: dict) -> bool:
+        """
+        Conditional GET with the cached entry's validators. True only when
+        the origin answers 304 Not Modified; any failure means re-scrape.
+        """
+        headers = {}
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        if not headers:
+            return False
+        try:
+            # stream=True: on a 200 the body is never downloaded, the page
+            # is rendered by the browser instead
+            response = self.session.get(url, headers=headers, timeout=10, stream=True)
+        except requests.RequestException:
+            return False
+        response.close()
+        return response.status_code == 304
 
+    async def scrape_urls(
+        self, urls: List[str], refresh: bool = False
+    ) -> List[Union[Dict[str, Optional[str]], Exception]]:
+        """
+        Scrape several URLs concurrently, at most self.concurrency at a time.
+        All of them share the pooled browser, each in its own context.
+        Results come back in input order; a failed URL yields its exception
+        instead of failing the whole batch.
+        """
+
+        async def scrape_one(url: str):
+            async with self._scrape_semaphore:
+                return await self.scrape_url(url, refresh)
+
+        return await asyncio.gather(
+            *(scrape_one(url) for url in urls), return_exceptions=True
+        )
+
+    async def scrape_urls_batch(
+        self, urls: List[str], refresh: bool = False
+    ) -> List[Union[Dict[str, Optional[str]], Exception]]:
+        """
+        Scrape a large import through the Gemini Batch API: render every
+        uncached page, then extract them all in one batch job at half the
+        per-request cost. The job can take minutes to hours, so run this in
+        the background; results land in the cache like a normal scrape.
+        Results and failures come back in input order, as with scrape_urls.
+        """
+        results: List[Union[Dict[str, Optional[str]], Exception, None]] = [None] * len(urls)
+        pending = {}  # cache file name -> (indexes, url, cache_file, entry)
+        for index, url in enumerate(urls):
+            try:
+                cache_file = self._cache_file(url)
+                entry = None if refresh else await self._read_cache(cache_file)
+                cached = await self._cached_result(url, cache_file, entry)
+            except Exception as e:
+                results[index] = e
+                continue
+            if cached is not None:
+                results[index] = cached
+            elif cache_file.stem in pending:
+                pending[cache_file.stem][0].append(index)
+            else:
+                pending[cache_file.stem] = ([index], url, cache_file, entry)
+
+        keys = list(pending)
+        pages = await asyncio.gather(
+            *(self._fetch_page(pending[key][1]) for key in keys),
+            return_exceptions=True,
+        )
+        rendered = {}
+        for key, page in zip(keys, pages):
+            indexes, url, cache_file, entry = pending[key]
+            if isinstance(page, Exception):
+                for index in indexes:
+                    results[index] = Exception(f"Failed to scrape URL: {page}")
+                continue
+            cached = self._unchanged_result(url, cache_file, entry, page)
+            if cached is None:
+                scrape_error = _unusable_page_reason(page.clean_text)
+                if scrape_error is not None:
+                    cached = self._unusable_result(url, page, scrape_error)
+            if cached is not None:
+                for index in indexes:
+                    results[index] = cached
+            else:
+                rendered[key] = page
+
+        extracted = {}
+        if not refresh:
+            for key, page in rendered.items():
+                job_data = await self._read_llm_cache(page.clean_text, pending[key][1])
+                if job_data is not None:
+                    extracted[key] = job_data
+        to_extract = [key for key in rendered if key not in extracted]
+
+        if len(to_extract) < BATCH_API_MIN_URLS:
+            # Not worth a batch job's latency; extract each page directly
+            async def extract(key: str):
+                async with self._scrape_semaphore:
+                    return await self._extract_with_gemini(
+                        rendered[key].clean_text, pending[key][1], refresh
+                    )
+
+            extractions = await asyncio.gather(
+                *(extract(key) for key in to_extract), return_exceptions=True
+            )
+            extracted.update(zip(to_extract, extractions))
+        else:
+            try:
+                batch_results = await self._extract_with_gemini_batch(
+                    {key: (rendered[key].clean_text, pending[key][1]) for key in to_extract}
+                )
+            except Exception as e:
+                # The whole job failed; report it against every page in it
+                batch_results = dict.fromkeys(to_extract, e)
+            for key, job_data in batch_results.items():
+                if not isinstance(job_data, Exception):
+                    await self._write_llm_cache(rendered[key].clean_text, job_data)
+            extracted.update(batch_results)
+
+        for key, job_data in extracted.items():
+            indexes, url, cache_file, _ = pending[key]
+            if not isinstance(job_data, Exception):
+                try:
+                    job_data = await self._save_result(cache_file, rendered[key], job_data)
+                except Exception as e:
+                    job_data = e
+            if isinstance(job_data, Exception):
+                job_data = Exception(f"Failed to scrape URL: {job_data}")
+            for index in indexes:
+                results[index] = job_data
+        return results
+
+    def _extract_clean_text(self, text: str) -> str:
+        """
+        Clean up the main content text extracted from the page.
+        """
         # Remove excessive whitespace and empty lines
         lines = [line.strip() for line in text.split("\n") if line.strip()]
         clean_text = "\n".join(lines)
 
-        # Limit text length to avoid token limits (approximately 10k tokens = 40k chars)
-        if len(clean_text) > 40000:
-            clean_text = clean_text[:40000] + "\n...(content truncated)"
+        # Limit text length to avoid token limits, keeping both ends
+        truncated = _truncate_middle(clean_text, MAX_TEXT_TOKENS)
+        if truncated is not clean_text:
             print("content was too long and truncated")
+        clean_text = truncated
 
         return clean_text
 
     async def _extract_with_gemini(
-        self, text: str, url: str
+        self, text: str, url: str, refresh: bool = False
     ) -> Dict[str, Optional[str]]:
         """
         Use Google Gemini to extract structured job information from clean text.
+        With refresh=True Gemini is asked again and its answer replaces the
+        cached one.
         """
-        if not self.google_api_key:
+        cached = None if refresh else await self._read_llm_cache(text, url)
+        if cached is not None:
+            print(f"Extraction cache hit for URL: {url}")
+            return cached
+
+        if not self.api_keys:
             raise Exception(
                 "GOOGLE_API_KEY not configured. Please add it to your .env file."
             )
 
-        # Construct the prompt for Gemini
-        prompt = f"""Extract job posting information from the following text and return it as a single, valid JSON object.
+        prompt = self._build_prompt(text, url)
+
+        try:
+            # --- Retry Logic for API Rate Limiting ---
+            max_retries = 8
+            attempt = 0
+            fallback_models = iter(GEMINI_FALLBACK_MODELS)
+            model_name = GEMINI_MODEL
+            server_errors = 0
+
+            while True:
+                api_key = self._next_api_key()
+                model = self._gemini_model(api_key, model_name)
+                try:
+                    # The google-generativeai library has its own retry mechanism for some errors,
+                    # but we add our own for explicit control over 429s.
+                    response = await model.generate_content_async(prompt)
+                    break  # Success, exit loop
+                except genai.types.generation_types.BlockedPromptException as e:
+                    # If the prompt is blocked for safety reasons, we can't retry.
+                    raise Exception(f"Gemini prompt was blocked: {e}")
+                except Exception as e:
+                    # Quota errors first: their messages can contain numbers
+                    # that look like 5xx codes
+                    if _is_rate_limit(e):
+                        self._key_cooldowns[api_key] = time.monotonic() + API_KEY_COOLDOWN
+                        if self._has_available_key():
+                            # Another key still has quota, use it straight away
+                            print("Rate limit hit. Switching to the next API key...")
+                            continue
+
+                        attempt += 1
+                        if attempt < max_retries:
+                            delay = _backoff_delay(attempt - 1)
+                            print(
+                                f"Rate limit hit. Retrying in {delay:.1f} seconds... (Attempt {attempt}/{max_retries})"
+                            )
+                            await asyncio.sleep(delay)
+                            continue
+                        raise  # Every key is rate limited and this was the last attempt
+
+                    if not _is_server_error(e):
+                        raise
+
+                    server_errors += 1
+                    if server_errors < SERVER_ERROR_ATTEMPTS:
+                        delay = _backoff_delay(server_errors - 1)
+                        print(f"Gemini server error on {model_name}. Retrying in {delay:.1f} seconds...")
+                        await asyncio.sleep(delay)
+                        continue
+                    model_name = next(fallback_models, None)
+                    if model_name is None:
+                        raise  # Every model in the chain failed
+                    print(f"Gemini server errors persist. Falling back to {model_name}...")
+                    server_errors = 0
+
+            # --- End Retry Logic ---
+            job_data = self._parse_job_json(response.text, url)
+
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse Gemini response as JSON: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Gemini extraction failed: {str(e)}")
+
+        await self._write_llm_cache(text, job_data)
+        return job_data
+
+    def _llm_cache_file(self, text: str) -> Path:
+        text_hash = hashlib.sha256(f"{PROMPT_VERSION}:{text}".encode()).hexdigest()
+        return self.llm_cache_dir / f"{text_hash}.json"
+
+    async def _read_llm_cache(self, text: str, url: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Gemini's earlier answer for this page text, with the job URL set to
+        the URL being scraped now, or None if the text was never extracted
+        or the answer has expired.
+        """
+        cache_file = self._llm_cache_file(text)
+        try:
+            stat = await aiofiles.os.stat(cache_file)
+            if datetime.now() - datetime.fromtimestamp(stat.st_mtime) >= LLM_CACHE_DURATION:
+                return None
+            async with aiofiles.open(cache_file, "rb") as f:
+                job_data = orjson.loads(await f.read())
+        except (OSError, ValueError):
+            return None
+        job_data["job_url"] = url
+        return job_data
+
+    async def _write_llm_cache(self, text: str, job_data: Dict[str, Optional[str]]):
+        async with aiofiles.open(self._llm_cache_file(text), "wb") as f:
+            await f.write(orjson.dumps(job_data, option=orjson.OPT_INDENT_2))
+
+        self._llm_cache_writes += 1
+        if self._llm_cache_writes % LLM_CACHE_PRUNE_EVERY == 0:
+            await asyncio.to_thread(self._prune_llm_cache)
+
+    def _prune_llm_cache(self):
+        """
+        Delete expired Gemini answers, then the oldest ones beyond
+        LLM_CACHE_MAX_ENTRIES.
+        """
+        entries = []
+        for entry in os.scandir(self.llm_cache_dir):
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue  # Removed by a concurrent prune
+        entries.sort(reverse=True)
+
+        expired_before = (datetime.now() - LLM_CACHE_DURATION).timestamp()
+        for index, (mtime, path) in enumerate(entries):
+            if index >= LLM_CACHE_MAX_ENTRIES or mtime < expired_before:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _next_api_key(self) -> str:
+        """
+        The next API key in rotation that is not cooling down after a rate
+        limit; if every key is, the one that recovers first.
+        """
+        now = time.monotonic()
+        for _ in range(len(self.api_keys)):
+            api_key = next(self._key_cycle)
+            if self._key_cooldowns[api_key] <= now:
+                return api_key
+        return min(self.api_keys, key=self._key_cooldowns.__getitem__)
+
+    def _has_available_key(self) -> bool:
+        now = time.monotonic()
+        return any(until <= now for until in self._key_cooldowns.values())
+
+    def _gemini_model(self, api_key: str, model_name: str) -> genai.GenerativeModel:
+        """
+        The Gemini model that sends its requests with the given API key.
+        """
+        model = self._gemini_models.get((api_key, model_name))
+        if model is None:
+            # genai takes the key from its global configuration, and a model
+            # binds the configured client on its first request. The caller
+            # sends that request right away, before any other task can
+            # reconfigure, so each cached model keeps its own key.
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(
+                model_name, generation_config=GENERATION_CONFIG
+            )
+            self._gemini_models[(api_key, model_name)] = model
+        return model
+
+    async def _extract_with_gemini_batch(
+        self, pages: Dict[str, tuple]
+    ) -> Dict[str, Union[Dict[str, Optional[str]], Exception]]:
+        """
+        Extract many pages, given as {key: (text, url)}, in one Gemini Batch
+        API job read from an uploaded JSONL file. Waits for the job to finish
+        and returns {key: job_data} with an exception for each page Gemini
+        failed on.
+        """
+        if not self.api_keys:
+            raise Exception(
+                "GOOGLE_API_KEY not configured. Please add it to your .env file."
+            )
+
+        api_headers = {"x-goog-api-key": self._next_api_key()}
+        input_file = await self._upload_batch_input(pages, api_headers)
+        batch = {
+            "batch": {
+                "display_name": f"job-scrape-{len(pages)}-urls",
+                "input_config": {"file_name": input_file},
+            }
+        }
+
+        # requests is synchronous, so every API call runs in a worker thread
+        response = await asyncio.to_thread(
+            self.session.post,
+            f"{GEMINI_API_URL}/models/{GEMINI_MODEL}:batchGenerateContent",
+            headers=api_headers,
+            json=batch,
+            timeout=60,
+        )
+        response.raise_for_status()
+        operation = response.json()
+        print(f"Submitted Gemini batch {operation['name']} for {len(pages)} pages")
+
+        while not operation.get("done"):
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            response = await asyncio.to_thread(
+                self.session.get,
+                f"{GEMINI_API_URL}/{operation['name']}",
+                headers=api_headers,
+                timeout=30,
+            )
+            response.raise_for_status()
+            operation = response.json()
+
+        # The job has read its input by now
+        await self._delete_batch_file(input_file, api_headers)
+
+        state = operation.get("metadata", {}).get("state", "")
+        if "error" in operation or not state.endswith("SUCCEEDED"):
+            raise Exception(
+                f"Gemini batch {operation['name']} ended as {state}: {operation.get('error')}"
+            )
+
+        output = operation.get("response", {})
+        output_file = output.get("responsesFile") or output.get("output", {}).get(
+            "responsesFile"
+        )
+        if not output_file:
+            raise Exception(f"Gemini batch {operation['name']} returned no results file")
+
+        response = await asyncio.to_thread(
+            self.session.get,
+            f"{GEMINI_DOWNLOAD_URL}/{output_file}:download",
+            params={"alt": "media"},
+            headers=api_headers,
+            timeout=60,
+        )
+        response.raise_for_status()
+        await self._delete_batch_file(output_file, api_headers)
+
+        missing = Exception("Gemini batch returned no response for this page")
+        extracted = dict.fromkeys(pages, missing)
+        for line in response.content.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            key = item.get("key")
+            if key not in pages:
+                continue
+            if "error" in item:
+                extracted[key] = Exception(f"Gemini extraction failed: {item['error']}")
+                continue
+            try:
+                parts = item["response"]["candidates"][0]["content"]["parts"]
+                text = "".join(part.get("text", "") for part in parts)
+                extracted[key] = self._parse_job_json(text, pages[key][1])
+            except (KeyError, IndexError, ValueError) as e:
+                extracted[key] = Exception(f"Failed to parse Gemini response: {e}")
+        return extracted
+
+    async def _upload_batch_input(self, pages: Dict[str, tuple], api_headers: dict) -> str:
+        """
+        Upload one batch request per page, as JSONL, through the File API's
+        resumable upload. Returns the file's name for the batch input_config.
+        """
+        jsonl = b"".join(
+            orjson.dumps(
+                {
+                    "key": key,
+                    "request": {
+                        "contents": [{"parts": [{"text": self._build_prompt(text, url)}]}],
+                        "generation_config": GENERATION_CONFIG,
+                    },
+                }
+            )
+            + b"\n"
+            for key, (text, url) in pages.items()
+        )
+
+        response = await asyncio.to_thread(
+            self.session.post,
+            GEMINI_UPLOAD_URL,
+            headers={
+                **api_headers,
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(len(jsonl)),
+                "X-Goog-Upload-Header-Content-Type": "application/jsonl",
+            },
+            json={"file": {"display_name": f"job-scrape-{len(pages)}-urls"}},
+            timeout=30,
+        )
+        response.raise_for_status()
+        upload_url = response.headers["X-Goog-Upload-URL"]
+
+        response = await asyncio.to_thread(
+            self.session.post,
+            upload_url,
+            headers={
+                **api_headers,
+                "X-Goog-Upload-Command": "upload, finalize",
+                "X-Goog-Upload-Offset": "0",
+            },
+            data=jsonl,
+            timeout=300,
+        )
+        response.raise_for_status()
+        return response.json()["file"]["name"]
+
+    async def _delete_batch_file(self, file_name: str, api_headers: dict):
+        """
+        Delete a batch input or results file. Files expire on their own after
+        48 hours, so a failure here is only logged.
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.session.delete,
+                f"{GEMINI_API_URL}/{file_name}",
+                headers=api_headers,
+                timeout=30,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Warning: could not delete Gemini file {file_name}: {e}")
+
+    def _parse_job_json(self, gemini_response: str, url: str) -> Dict[str, Optional[str]]:
+        """
+        Parse Gemini's structured JSON answer.
+        """
+        job_data = json.loads(gemini_response)
+
+        # Add the job URL
+        job_data["job_url"] = url
+
+        return job_data
+
+    def _build_prompt(self, text: str, url: str) -> str:
+        """
+        Construct the extraction prompt for one page's clean text.
+        """
+        return f"""Extract job posting information from the following text.
 
 The text is from this URL: {url}
 
@@ -161,73 +1310,9 @@ Please extract:
   * How to tailor the application/CV for maximum impact
   * Any red flags or challenges to be aware of
 
-Return ONLY valid JSON in this exact format (no markdown, no code blocks):
-{{
-  "company_name": "string or null",
-  "position_title": "string or null",
-  "location": "string or null",
-  "salary": "string or null",
-  "description": "string or null",
-  "requirements": "string or null",
-  "application_deadline": "string or null",
-  "ai_thoughts": "string with strategic advice"
-}}
-
 If any field cannot be determined from the text, use null. Always provide ai_thoughts based on the job description.
 
 TEXT TO ANALYZE:
 {text}
 """
 
-        try:
-            model = genai.GenerativeModel("gemini-2.5-flash")
-
-            # --- Retry Logic for API Rate Limiting ---
-            max_retries = 3
-            delay = 5  # Initial delay in seconds
-
-            for attempt in range(max_retries):
-                try:
-                    # The google-generativeai library has its own retry mechanism for some errors,
-                    # but we add our own for explicit control over 429s.
-                    response = await model.generate_content_async(prompt)
-                    break  # Success, exit loop
-                except genai.types.generation_types.BlockedPromptException as e:
-                    # If the prompt is blocked for safety reasons, we can't retry.
-                    raise Exception(f"Gemini prompt was blocked: {e}")
-                except Exception as e:
-                    # Catching potential rate limit errors (often appear as 503 or 429)
-                    # The Gemini library may abstract this, so we check the error message.
-                    is_rate_limit = (
-                        "429" in str(e)
-                        or "resource has been exhausted" in str(e).lower()
-                    )
-                    if is_rate_limit and attempt < max_retries - 1:
-                        print(
-                            f"Rate limit hit. Retrying in {delay} seconds... (Attempt {attempt + 1}/{max_retries})"
-                        )
-                        await asyncio.sleep(delay)
-                        delay *= 2  # Exponential backoff
-                    else:
-                        raise  # Re-raise the exception if it's not a rate limit or if it's the last attempt
-
-            # --- End Retry Logic ---
-            gemini_response = response.text.strip()
-
-            # Clean up the response (remove markdown code blocks if present)
-            gemini_response = re.sub(r"^```json\s*", "", gemini_response)
-            gemini_response = re.sub(r"^```\s*", "", gemini_response)
-            gemini_response = re.sub(r"\s*```$", "", gemini_response)
-
-            # Parse JSON response
-            job_data = json.loads(gemini_response)
-
-            # Add the job URL
-            job_data["job_url"] = url
-
-            return job_data
-
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse Gemini response as JSON: {str(e)}")
-        except Exception as e:
-            raise Exception(f"Gemini extraction failed: {str(e)}")